@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import random
 
+from cargo_revenue import calc_cargo_revenue
+
 # ページ設定
 st.set_page_config(
     page_title="海運管理システム PoC",
@@ -12,11 +13,62 @@ st.set_page_config(
     layout="wide"
 )
 
+# カテゴリ定義
+SHIP_STATUS_DTYPE = pd.CategoricalDtype(["航海中", "荷役中", "沖待ち", "入港準備"])
+CARGO_PATTERN_DTYPE = pd.CategoricalDtype(["CORN+MILO", "CORN+BARLEY", "MILO+BARLEY"])
+
+# データ型定義（型推論を省略し、数値列はint32で保持）
+SHIP_DTYPES = {
+    'ship_id': 'string',
+    'ship_name': 'string',
+    'capacity': 'int32',
+    'status': SHIP_STATUS_DTYPE,
+}
+VOYAGE_DTYPES = {
+    'voyage_id': 'string',
+    'ship_name': 'string',
+    'ship_status': SHIP_STATUS_DTYPE,
+    'total_cargo': 'int32',
+    'cargo_pattern': CARGO_PATTERN_DTYPE,
+    'corn_tons': 'int32',
+    'milo_tons': 'int32',
+    'barley_tons': 'int32',
+    'loading_port': 'string',
+    'discharge_ports': 'string',
+}
+
+# 表示用カラム名（列名 -> 表示名）
+DASHBOARD_COLUMNS = {
+    'ship_name': '船舶名',
+    'cargo_pattern': '貨物構成',
+    'total_cargo': '積載量(t)',
+    'loading_port': '積地',
+    'eta_display': 'ETA',
+}
+ANALYSIS_COLUMNS = {
+    'voyage_id': '航海ID',
+    'ship_name': '船舶名',
+    'cargo_pattern': '貨物パターン',
+    'corn_tons': 'コーン(t)',
+    'milo_tons': 'マイロ(t)',
+    'barley_tons': '飼料麦(t)',
+    'total_cargo': '合計(t)',
+}
+
+# テーブル1ページあたりの最大表示行数
+MAX_TABLE_ROWS = 1000
+
+# 円グラフ描画設定（モードバー非表示）
+PIE_CHART_CONFIG = {'displayModeBar': False, 'responsive': True}
+
 # サンプルデータ生成関数
-@st.cache_data
+@st.cache_data(ttl=3600, show_spinner=False)
 def generate_sample_data():
     """デモ用サンプルデータ生成"""
     
+    # 再起動後も同じデータになるよう乱数を固定
+    rng = np.random.default_rng(42)
+    
     # 船舶データ
     ships_data = [
         {"ship_id": "BULK_001", "ship_name": "海王丸", "capacity": 60000, "status": "航海中"},
@@ -24,80 +76,180 @@ def generate_sample_data():
         {"ship_id": "BULK_003", "ship_name": "太平丸", "capacity": 62000, "status": "沖待ち"},
         {"ship_id": "BULK_004", "ship_name": "東海丸", "capacity": 59000, "status": "入港準備"},
     ]
-    
-    # 航海データ
-    voyages_data = []
-    cargo_patterns = [
-        {"pattern": "CORN+MILO", "corn_ratio": 0.6, "milo_ratio": 0.4, "barley_ratio": 0.0},
-        {"pattern": "CORN+BARLEY", "corn_ratio": 0.7, "milo_ratio": 0.0, "barley_ratio": 0.3},
-        {"pattern": "MILO+BARLEY", "corn_ratio": 0.0, "milo_ratio": 0.55, "barley_ratio": 0.45},
-    ]
-    
-    for i, ship in enumerate(ships_data):
-        pattern = random.choice(cargo_patterns)
-        total_cargo = ship["capacity"] - random.randint(2000, 5000)
-        
-        voyage = {
-            "voyage_id": f"V2024{i+1:03d}",
-            "ship_name": ship["ship_name"],
-            "ship_status": ship["status"],
-            "total_cargo": total_cargo,
-            "cargo_pattern": pattern["pattern"],
-            "corn_tons": int(total_cargo * pattern["corn_ratio"]),
-            "milo_tons": int(total_cargo * pattern["milo_ratio"]),
-            "barley_tons": int(total_cargo * pattern["barley_ratio"]),
-            "loading_port": random.choice(["Seattle", "Vancouver", "New Orleans"]),
-            "eta": datetime.now() + timedelta(days=random.randint(1, 10)),
-            "discharge_ports": random.choice([["CHIBA"], ["YOKOHAMA"], ["CHIBA", "NAGOYA"], ["YOKOHAMA", "CHIBA"]]),
-        }
-        voyages_data.append(voyage)
-    
-    return pd.DataFrame(ships_data), pd.DataFrame(voyages_data)
+    ships_df = pd.DataFrame.from_records(ships_data, columns=list(SHIP_DTYPES)).astype(SHIP_DTYPES, copy=False)
+    n_ships = len(ships_df)
+    
+    # 貨物パターン別のコーン・マイロ・飼料麦比率（CARGO_PATTERN_DTYPEの順）
+    cargo_ratios = np.array([
+        [0.6, 0.4, 0.0],
+        [0.7, 0.0, 0.3],
+        [0.0, 0.55, 0.45],
+    ])
+    loading_ports = np.array(["Seattle", "Vancouver", "New Orleans"], dtype=object)
+    # 揚地は寄港順にカンマ区切りで保持
+    discharge_ports = np.array(["CHIBA", "YOKOHAMA", "CHIBA,NAGOYA", "YOKOHAMA,CHIBA"], dtype=object)
+    
+    # 航海データ（船舶ごとに1航海をまとめて生成）
+    pat_idx = rng.integers(0, len(CARGO_PATTERN_DTYPE.categories), n_ships)
+    ratios = cargo_ratios[pat_idx]
+    total_cargo = ships_df["capacity"].to_numpy() - rng.integers(2000, 5001, n_ships)
+    
+    voyages_df = pd.DataFrame({
+        "voyage_id": [f"V2024{i+1:03d}" for i in range(n_ships)],
+        "ship_name": ships_df["ship_name"].to_numpy(),
+        "ship_status": ships_df["status"].array,
+        "total_cargo": total_cargo,
+        "cargo_pattern": pd.Categorical.from_codes(pat_idx, dtype=CARGO_PATTERN_DTYPE),
+        "corn_tons": (total_cargo * ratios[:, 0]).astype(np.int32),
+        "milo_tons": (total_cargo * ratios[:, 1]).astype(np.int32),
+        "barley_tons": (total_cargo * ratios[:, 2]).astype(np.int32),
+        "loading_port": rng.choice(loading_ports, n_ships),
+        "eta": pd.Timestamp.now() + pd.to_timedelta(rng.integers(1, 11, n_ships), unit="D"),
+        "discharge_ports": rng.choice(discharge_ports, n_ships),
+    }).astype(VOYAGE_DTYPES, copy=False)
+    # 表示用ETA（描画ごとのフォーマット処理を省略）
+    voyages_df['eta_display'] = voyages_df['eta'].dt.strftime('%m/%d %H:%M')
+    
+    return ships_df, voyages_df
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_data():
+    """全セッションで共有するデータ読み込み"""
+    return generate_sample_data()
+
+def paginate(df, key):
+    """テーブル表示用のページ分割（MAX_TABLE_ROWS超過時のみ）"""
+    if len(df) <= MAX_TABLE_ROWS:
+        return df
+    
+    n_pages = -(-len(df) // MAX_TABLE_ROWS)
+    page = st.number_input("表示ページ", min_value=1, max_value=n_pages, value=1, step=1, key=key)
+    start = (page - 1) * MAX_TABLE_ROWS
+    return df.iloc[start:start + MAX_TABLE_ROWS]
+
+@st.cache_data(show_spinner=False)
+def cargo_aggregates(voyages_df):
+    """貨物タイプ別合計と貨物パターン別頻度の集計"""
+    cargo_totals = voyages_df[['corn_tons', 'milo_tons', 'barley_tons']].to_numpy().sum(axis=0, dtype=np.int64)
+    pattern_counts = voyages_df['cargo_pattern'].value_counts()
+    return cargo_totals, pattern_counts
+
+@st.cache_data(show_spinner=False)
+def voyage_summary(voyages_df, cargo_filter):
+    """貨物フィルター適用後の航海数と平均積載量の集計"""
+    # 全パターン選択時はフィルター処理を省略
+    if set(cargo_filter) == set(CARGO_PATTERN_DTYPE.categories):
+        filtered_df = voyages_df
+    else:
+        filtered_df = voyages_df[voyages_df['cargo_pattern'].isin(cargo_filter)]
+    return len(filtered_df), filtered_df['total_cargo'].mean()
+
+@st.cache_data(show_spinner=False)
+def monthly_cargo_series():
+    """デモ用月別取扱量データ生成"""
+    date_range = pd.date_range(start='2024-01-01', end='2024-06-30', freq='ME')
+    monthly_cargo = np.random.default_rng(0).integers(
+        150000, 200001, size=len(date_range), dtype=np.int32
+    )
+    return pd.DataFrame({
+        'Month': date_range,
+        'Cargo_Volume': monthly_cargo
+    })
+
+@st.cache_resource(show_spinner=False)
+def status_pie_chart(status_items):
+    """船舶ステータス分布チャート生成（(ステータス, 隻数)のタプルをキーにキャッシュ）"""
+    fig = go.Figure(go.Pie(
+        values=[count for _, count in status_items],
+        labels=[status for status, _ in status_items],
+        textposition='inside',
+        textinfo='percent+label'
+    ))
+    fig.update_layout(title="船舶ステータス分布", transition={'duration': 0}, uirevision='status_pie')
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def pattern_bar_chart(pattern_items):
+    """合積みパターン使用頻度チャート生成"""
+    fig = go.Figure(go.Bar(
+        x=[pattern for pattern, _ in pattern_items],
+        y=[count for _, count in pattern_items],
+        marker_color=['#FF6B6B', '#4ECDC4', '#45B7D1']
+    ))
+    fig.update_layout(
+        title="合積みパターン使用頻度",
+        xaxis_title='貨物パターン',
+        yaxis_title='航海数'
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def cargo_type_pie_chart(cargo_items):
+    """貨物タイプ別構成比チャート生成"""
+    fig = go.Figure(go.Pie(
+        values=[tons for _, tons in cargo_items],
+        labels=[cargo for cargo, _ in cargo_items],
+        textposition='inside',
+        textinfo='percent+label',
+        marker_colors=['#FFD93D', '#6BCF7F', '#4D96FF']
+    ))
+    fig.update_layout(title="貨物タイプ別構成比", transition={'duration': 0}, uirevision='cargo_type_pie')
+    return fig
+
+# 期間選択肢の数だけ保持し、入力データが変わってもキャッシュが増え続けないようにする
+@st.cache_resource(max_entries=4, show_spinner=False)
+def monthly_cargo_chart(monthly_df, period):
+    """月別取扱量推移チャート生成"""
+    fig = go.Figure(go.Scattergl(
+        x=monthly_df['Month'],
+        y=monthly_df['Cargo_Volume'],
+        mode='lines',
+        line=dict(color='#FF6B6B', width=3)
+    ))
+    fig.update_layout(
+        title=f"月別取扱量推移 ({period})",
+        xaxis_title='月',
+        yaxis_title='取扱量 (t)'
+    )
+    return fig
 
 def main():
+    # データ読み込み
+    ships_df, voyages_df = load_data()
+    
     st.title("🚢 海運管理システム PoC")
     st.markdown("---")
     
+    # ページ定義（表示名 -> 描画関数）
+    pages = {
+        "🏠 ダッシュボード": lambda: show_dashboard(ships_df, voyages_df),
+        "📊 合積み分析": lambda: show_cargo_analysis(voyages_df),
+        "🎯 最適化シミュレーション": show_optimization_sim,
+        "📈 実績レポート": lambda: show_performance_report(voyages_df),
+    }
+    
     # サイドバー
     st.sidebar.title("📋 ナビゲーション")
-    page = st.sidebar.selectbox(
-        "ページ選択",
-        ["🏠 ダッシュボード", "📊 合積み分析", "🎯 最適化シミュレーション", "📈 実績レポート"]
-    )
+    page = st.sidebar.selectbox("ページ選択", list(pages))
     
-    # データ読み込み
-    ships_df, voyages_df = generate_sample_data()
-    
-    if page == "🏠 ダッシュボード":
-        show_dashboard(ships_df, voyages_df)
-    elif page == "📊 合積み分析":
-        show_cargo_analysis(voyages_df)
-    elif page == "🎯 最適化シミュレーション":
-        show_optimization_sim()
-    elif page == "📈 実績レポート":
-        show_performance_report(voyages_df)
+    pages[page]()
 
 def show_dashboard(ships_df, voyages_df):
     st.header("📊 現在の運航状況")
     
-    # KPIメトリクス
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        sailing_ships = len(ships_df[ships_df['status'] == '航海中'])
-        st.metric("航海中", f"{sailing_ships}隻", "正常")
-    
-    with col2:
-        waiting_ships = len(ships_df[ships_df['status'] == '沖待ち'])
-        st.metric("沖待ち", f"{waiting_ships}隻", "12時間平均")
-    
-    with col3:
-        loading_ships = len(ships_df[ships_df['status'] == '荷役中'])
-        st.metric("荷役中", f"{loading_ships}隻", "進行中")
+    # ステータス別隻数（KPIと分布チャートで共用）
+    status_counts = ships_df['status'].value_counts()
     
-    with col4:
-        total_cargo = voyages_df['total_cargo'].sum()
-        st.metric("総取扱量", f"{total_cargo:,}t", "+15% vs前月")
+    # KPIメトリクス
+    total_cargo = voyages_df['total_cargo'].sum()
+    metrics = [
+        ("航海中", f"{status_counts.get('航海中', 0)}隻", "正常"),
+        ("沖待ち", f"{status_counts.get('沖待ち', 0)}隻", "12時間平均"),
+        ("荷役中", f"{status_counts.get('荷役中', 0)}隻", "進行中"),
+        ("総取扱量", f"{total_cargo:,}t", "+15% vs前月"),
+    ]
+    for col, (label, value, delta) in zip(st.columns(4), metrics):
+        col.metric(label, value, delta)
     
     st.markdown("---")
     
@@ -108,71 +260,46 @@ def show_dashboard(ships_df, voyages_df):
         st.subheader("🚢 船舶別運航状況")
         
         # 詳細情報付きテーブル
-        display_df = voyages_df[['ship_name', 'cargo_pattern', 'total_cargo', 'loading_port', 'eta']].copy()
-        display_df['eta'] = display_df['eta'].dt.strftime('%m/%d %H:%M')
-        display_df.columns = ['船舶名', '貨物構成', '積載量(t)', '積地', 'ETA']
-        
-        st.dataframe(display_df, use_container_width=True)
+        st.dataframe(
+            paginate(voyages_df, "dashboard_page")[list(DASHBOARD_COLUMNS)].rename(columns=DASHBOARD_COLUMNS),
+            use_container_width=True
+        )
     
     with col2:
         st.subheader("📈 船舶ステータス")
         
         # ステータス分布
-        status_counts = ships_df['status'].value_counts()
-        fig = px.pie(
-            values=status_counts.values,
-            names=status_counts.index,
-            title="船舶ステータス分布"
-        )
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        fig = status_pie_chart(tuple(status_counts.items()))
+        st.plotly_chart(fig, use_container_width=True, config=PIE_CHART_CONFIG)
 
 def show_cargo_analysis(voyages_df):
     st.header("📊 合積み構成分析")
     
+    cargo_totals_arr, pattern_counts = cargo_aggregates(voyages_df)
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("貨物パターン別頻度")
-        pattern_counts = voyages_df['cargo_pattern'].value_counts()
         
-        fig = px.bar(
-            x=pattern_counts.index,
-            y=pattern_counts.values,
-            title="合積みパターン使用頻度",
-            labels={'x': '貨物パターン', 'y': '航海数'}
-        )
-        fig.update_traces(marker_color=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+        fig = pattern_bar_chart(tuple(pattern_counts.items()))
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("貨物タイプ別取扱量")
         
-        cargo_totals = {
-            'CORN': voyages_df['corn_tons'].sum(),
-            'MILO': voyages_df['milo_tons'].sum(),
-            'BARLEY': voyages_df['barley_tons'].sum()
-        }
+        cargo_totals = dict(zip(['CORN', 'MILO', 'BARLEY'], cargo_totals_arr.tolist()))
         
-        fig = px.pie(
-            values=list(cargo_totals.values()),
-            names=list(cargo_totals.keys()),
-            title="貨物タイプ別構成比"
-        )
-        fig.update_traces(
-            textposition='inside', 
-            textinfo='percent+label',
-            marker_colors=['#FFD93D', '#6BCF7F', '#4D96FF']
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = cargo_type_pie_chart(tuple(cargo_totals.items()))
+        st.plotly_chart(fig, use_container_width=True, config=PIE_CHART_CONFIG)
     
     # 詳細分析テーブル
     st.subheader("🔍 航海別貨物詳細")
     
-    analysis_df = voyages_df[['voyage_id', 'ship_name', 'cargo_pattern', 'corn_tons', 'milo_tons', 'barley_tons', 'total_cargo']].copy()
-    analysis_df.columns = ['航海ID', '船舶名', '貨物パターン', 'コーン(t)', 'マイロ(t)', '飼料麦(t)', '合計(t)']
-    
-    st.dataframe(analysis_df, use_container_width=True)
+    st.dataframe(
+        paginate(voyages_df, "analysis_page")[list(ANALYSIS_COLUMNS)].rename(columns=ANALYSIS_COLUMNS),
+        use_container_width=True
+    )
 
 def show_optimization_sim():
     st.header("🎯 合積み最適化シミュレーション")
@@ -209,14 +336,9 @@ def show_optimization_sim():
         
         if st.button("🔍 最適化実行", type="primary"):
             # 計算実行
-            corn_tons = int(ship_capacity * corn_ratio)
-            milo_tons = int(ship_capacity * milo_ratio)
-            barley_tons = int(ship_capacity * barley_ratio)
-            
-            total_revenue = (
-                corn_tons * corn_price +
-                milo_tons * milo_price +
-                barley_tons * barley_price
+            corn_tons, milo_tons, barley_tons, total_revenue = calc_cargo_revenue(
+                ship_capacity, corn_ratio, milo_ratio, barley_ratio,
+                corn_price, milo_price, barley_price
             )
             
             # 結果表示
@@ -234,22 +356,25 @@ def show_optimization_sim():
                 st.metric("平均単価", f"${total_revenue/ship_capacity:.0f}/t")
                 
                 # 効率性スコア（デモ用）
-                efficiency_score = random.randint(75, 95)
-                st.metric("効率スコア", f"{efficiency_score}点", "良好")
+                if 'efficiency_score' not in st.session_state:
+                    st.session_state.efficiency_score = random.randint(75, 95)
+                st.metric("効率スコア", f"{st.session_state.efficiency_score}点", "良好")
             
             # 構成比チャート
             cargo_data = {
                 'Cargo': ['コーン', 'マイロ', '飼料麦'],
-                'Tons': [corn_tons, milo_tons, barley_tons],
-                'Revenue': [corn_tons * corn_price, milo_tons * milo_price, barley_tons * barley_price]
+                'Tons': np.array([corn_tons, milo_tons, barley_tons], dtype=np.int32),
             }
             
-            fig = px.bar(
-                cargo_data,
-                x='Cargo',
-                y=['Tons'],
+            fig = go.Figure(go.Bar(
+                x=cargo_data['Cargo'],
+                y=cargo_data['Tons'],
+                name='Tons'
+            ))
+            fig.update_layout(
                 title="最適化後の貨物構成",
-                labels={'value': 'トン数', 'Cargo': '貨物タイプ'}
+                xaxis_title='貨物タイプ',
+                yaxis_title='トン数'
             )
             st.plotly_chart(fig, use_container_width=True)
 
@@ -268,55 +393,38 @@ def show_performance_report(voyages_df):
         
         cargo_filter = st.multiselect(
             "貨物フィルター",
-            ["CORN+MILO", "CORN+BARLEY", "MILO+BARLEY"],
-            default=["CORN+MILO", "CORN+BARLEY", "MILO+BARLEY"]
+            list(CARGO_PATTERN_DTYPE.categories),
+            default=list(CARGO_PATTERN_DTYPE.categories)
         )
     
     with col2:
         st.subheader("📊 パフォーマンス指標")
         
-        # フィルター適用
-        filtered_df = voyages_df[voyages_df['cargo_pattern'].isin(cargo_filter)]
-        
         # 時系列データ（デモ用）
-        date_range = pd.date_range(start='2024-01-01', end='2024-06-30', freq='M')
-        monthly_cargo = [random.randint(150000, 200000) for _ in date_range]
+        monthly_df = monthly_cargo_series()
         
-        monthly_df = pd.DataFrame({
-            'Month': date_range,
-            'Cargo_Volume': monthly_cargo
-        })
-        
-        fig = px.line(
-            monthly_df,
-            x='Month',
-            y='Cargo_Volume',
-            title=f"月別取扱量推移 ({period})",
-            labels={'Cargo_Volume': '取扱量 (t)', 'Month': '月'}
-        )
-        fig.update_traces(line_color='#FF6B6B', line_width=3)
+        fig = monthly_cargo_chart(monthly_df, period)
         st.plotly_chart(fig, use_container_width=True)
     
     # サマリー統計
     st.subheader("📋 期間サマリー")
     
-    summary_col1, summary_col2, summary_col3, summary_col4 = st.columns(4)
+    # フィルター適用
+    total_voyages, avg_cargo = voyage_summary(voyages_df, tuple(sorted(cargo_filter)))
     
-    with summary_col1:
-        total_voyages = len(filtered_df)
-        st.metric("総航海数", f"{total_voyages}回")
+    if 'utilization' not in st.session_state:
+        st.session_state.utilization = random.randint(85, 95)
+    if 'on_time_rate' not in st.session_state:
+        st.session_state.on_time_rate = random.randint(88, 96)
     
-    with summary_col2:
-        avg_cargo = filtered_df['total_cargo'].mean()
-        st.metric("平均積載量", f"{avg_cargo:,.0f}t")
-    
-    with summary_col3:
-        utilization = random.randint(85, 95)
-        st.metric("船腹利用率", f"{utilization}%", "良好")
-    
-    with summary_col4:
-        on_time_rate = random.randint(88, 96)
-        st.metric("定時到着率", f"{on_time_rate}%", "+2%")
+    summary_metrics = [
+        ("総航海数", f"{total_voyages}回", None),
+        ("平均積載量", f"{avg_cargo:,.0f}t", None),
+        ("船腹利用率", f"{st.session_state.utilization}%", "良好"),
+        ("定時到着率", f"{st.session_state.on_time_rate}%", "+2%"),
+    ]
+    for col, (label, value, delta) in zip(st.columns(4), summary_metrics):
+        col.metric(label, value, delta)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,16 @@
+from numba import njit
+
+# Streamlitはapp.pyを再実行のたびに先頭から評価するため、JITカーネルは別モジュールに置き
+# sys.modules上で再利用する（コンパイルと事前実行はプロセスごとに1回のみ）
+
+@njit(cache=True)
+def calc_cargo_revenue(capacity, corn_ratio, milo_ratio, barley_ratio, corn_price, milo_price, barley_price):
+    """貨物構成比からトン数と総売上を計算"""
+    corn_tons = int(capacity * corn_ratio)
+    milo_tons = int(capacity * milo_ratio)
+    barley_tons = int(capacity * barley_ratio)
+    total_revenue = corn_tons * corn_price + milo_tons * milo_price + barley_tons * barley_price
+    return corn_tons, milo_tons, barley_tons, total_revenue
+
+# 初回の最適化実行時にJITコンパイルが走らないよう事前にコンパイル
+calc_cargo_revenue(60000, 0.6, 0.3, 0.1, 250.0, 240.0, 280.0)